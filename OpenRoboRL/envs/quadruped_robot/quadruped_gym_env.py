@@ -185,10 +185,11 @@ class LocomotionGymEnv(gym.Env):
         if self._is_render:
             self._pybullet_client = bullet_client.BulletClient(
                 connection_mode=pybullet.GUI)
-            pybullet.configureDebugVisualizer(
-                pybullet.COV_ENABLE_GUI,
+            self._pybullet_client.configureDebugVisualizer(
+                self._pybullet_client.COV_ENABLE_GUI,
                 self._sim_params["enable_rendering_gui"])
-            self._delay_id = pybullet.addUserDebugParameter("delay", 0, 0.3, 0)
+            self._delay_id = self._pybullet_client.addUserDebugParameter(
+                "delay", 0, 0.3, 0)
         else:
             self._pybullet_client = bullet_client.BulletClient(
                 connection_mode=pybullet.DIRECT)
@@ -217,12 +218,17 @@ class LocomotionGymEnv(gym.Env):
 
         for i in range(self.num_robot):
             self._robot[i].set_act(action[i])
+        # Bind the per-substep callables once; the substep loop runs
+        # action_repeat times per control step for every robot.
+        robot_steps = [robot.robot_step for robot in self._robot]
+        receive_obs = [robot.receive_obs for robot in self._robot]
+        step_simulation = self._pybullet_client.stepSimulation
         for i in range(self._robot[0].action_repeat):
-            for j in range(self.num_robot):
-                self._robot[j].robot_step(i)
-            self._pybullet_client.stepSimulation()
-            for j in range(self.num_robot):
-                self._robot[j].receive_obs()
+            for robot_step in robot_steps:
+                robot_step(i)
+            step_simulation()
+            for receive in receive_obs:
+                receive()
         for i in range(self.num_robot):
             obs[i] = self._robot[i].get_obs()
         obs = self._flatten_observation(obs)
@@ -42,8 +42,8 @@ MOTOR_NAMES = [
     "RL_upper_leg_2_hip_motor_joint",
     "RL_lower_leg_2_upper_leg_joint",
 ]
-PATTERN = [re.compile(r"\w+_chassis_\w+"), re.compile(r"\w+_hip_motor_\w+"),
-           re.compile(r"\w+_lower_leg_\w+"), re.compile(r"jtoe\d*")]
+PATTERN = (re.compile(r"\w+_chassis_\w+"), re.compile(r"\w+_hip_motor_\w+"),
+           re.compile(r"\w+_lower_leg_\w+"), re.compile(r"jtoe\d*"))
 
 INIT_POSITION = [0, 0, 0.48]
 INIT_QUAT = [0.5, 0.5, 0.5, 0.5]
@@ -42,8 +42,8 @@ MOTOR_NAMES = [
     "abduct_hr_to_thigh_hr_j",
     "thigh_hr_to_knee_hr_j",
 ]
-PATTERN = [re.compile(r"torso_"), re.compile(r"abduct_"),
-           re.compile(r"thigh_"), re.compile(r"toe_")]
+PATTERN = (re.compile(r"torso_"), re.compile(r"abduct_"),
+           re.compile(r"thigh_"), re.compile(r"toe_"))
 
 INIT_RACK_POSITION = [0, 0, 1]
 INIT_POSITION = [0, 0, 0.28]
@@ -18,8 +18,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import collections
-import copy
 import math
 import re
 import typing
@@ -35,6 +33,12 @@ from envs.utilities.sensors import robot_sensors
 from envs.utilities.randomizer import controllable_env_randomizer_from_config
 from envs.utilities import pose3d
 
+# Number of past true observations kept to simulate sensor latency.
+OBSERVATION_HISTORY_LEN = 100
+# Standard deviation of the sensor noise for [motor_angle, motor_velocity,
+# motor_torque, base_roll_pitch_yaw, base_angular_velocity].
+OBSERVATION_NOISE_STDEV = (0.0, 0.0, 0.0, 0.0, 0.0)
+
 
 class Minitaur(object):
     """The minitaur class that simulates a quadruped robot from Ghost Robotics."""
@@ -102,34 +106,79 @@ class Minitaur(object):
         self.num_motors = robot.NUM_MOTORS
         self.name_motor = robot.MOTOR_NAMES
         self.pattern = robot.PATTERN
-        self._init_pos = robot.INIT_POSITION
+        self._init_pos = tuple(robot.INIT_POSITION)
         self._init_quat = robot.INIT_QUAT
-        self._init_motor_angle = robot.INIT_MOTOR_ANGLES
-        self._motor_direction = robot.JOINT_DIRECTIONS
-        self._motor_offset = robot.JOINT_OFFSETS
+        # Per-motor parameters are kept as C-contiguous float64 arrays, matching
+        # the torques from the motor model, so the elementwise math on the
+        # control path never needs to copy or cast them. float32 would round the
+        # joint offsets and get upcast on every multiply anyway.
+        self._init_motor_angle = np.ascontiguousarray(
+            robot.INIT_MOTOR_ANGLES, dtype=np.float64)
+        self._motor_direction = np.ascontiguousarray(
+            robot.JOINT_DIRECTIONS, dtype=np.float64)
+        self._motor_offset = np.ascontiguousarray(
+            robot.JOINT_OFFSETS, dtype=np.float64)
+        # None of the inputs change after construction, so the default joint pose
+        # is computed once and shared read-only.
+        self._default_init_joint_pos = (
+            (self._init_motor_angle + self._motor_offset) * self._motor_direction)
+        self._default_init_joint_pos.flags.writeable = False
         self._control_latency = robot.CTRL_LATENCY
-        self._motor_kp = robot.motor_kp
-        self._motor_kd = robot.motor_kd
+        self._motor_kp = np.ascontiguousarray(robot.motor_kp, dtype=np.float64)
+        self._motor_kd = np.ascontiguousarray(robot.motor_kd, dtype=np.float64)
         self._motor_control_mode = minitaur_motor.POSITION
         self._overheat_shutdown_tau = robot.OVERHEAT_SHUTDOWN_TORQUE
         self._overheat_shutdown_time = robot.OVERHEAT_SHUTDOWN_TIME
         self._max_motor_angle_step = robot.MAX_MOTOR_ANGLE_CHANGE_PER_STEP
+        self._overheat_limit_steps = (
+            self._overheat_shutdown_time / self.time_step)
+        # Interpolation weights (k + 1) / action_repeat for each substep k.
+        self._lerp_table = (np.arange(1, self._action_repeat + 1) /
+                            self._action_repeat)
+        # The duration of one control step.
+        self._control_time_step = self.time_step * self._action_repeat
 
         self._enable_randomizer = enable_randomizer
         self._robot_index = robot_index
         self.num_legs = self.num_motors // robot.DOFS_PER_LEG
         self._self_collision_enabled = False
         self._observed_motor_torques = np.zeros(self.num_motors)
-        self._applied_motor_torques = np.zeros(self.num_motors)
+        # Raw joint positions and velocities of the motors, unpacked from the
+        # joint states once per receive_obs.
+        self._joint_angle_buf = np.empty(self.num_motors)
+        self._joint_vel_buf = np.empty(self.num_motors)
+        self._motor_vel_buf = np.empty(self.num_motors)
+        self._noise_buf = np.empty(self.num_motors)
+        self._proc_action_buf = np.empty(self.num_motors)
+        self._motor_command_buf = np.empty(self.num_motors)
+        self._motor_command_lower_buf = np.empty(self.num_motors)
+        self._motor_command_upper_buf = np.empty(self.num_motors)
+        # Created on the first noisy reading, see _add_sensor_noise.
+        self._rng = None
+        self._applied_motor_torque = np.zeros(self.num_motors)
+        self._motor_torque_buf = np.empty(self.num_motors)
+        self._overheat_tau_buf = np.empty(self.num_motors)
+        self._overheat_mask_buf = np.empty(self.num_motors, dtype=bool)
         self._max_force = 3.5
         self._pd_latency = 0.0
-        self._observation_noise_stdev = (0.0, 0.0, 0.0, 0.0, 0.0)
-        self._observation_history = collections.deque(maxlen=100)
-        self._control_observation = []
-        self._chassis_link_ids = [-1]
-        self._leg_link_ids = []
-        self._motor_link_ids = []
-        self._foot_link_ids = []
+        self._observation_noise_stdev = OBSERVATION_NOISE_STDEV
+        # [motor_angle, motor_velocity, motor_torque, base_orientation,
+        #  base_rpy_rate]
+        self._observation_dim = 3 * self.num_motors + 4 + 3
+        # Ring buffer of true observations. The most recent observation is
+        # stored at _observation_history_head and older ones follow it.
+        self._observation_history = np.zeros(
+            (OBSERVATION_HISTORY_LEN, self._observation_dim))
+        self._observation_history_head = 0
+        self._observation_history_len = 0
+        self._control_observation = np.zeros(self._observation_dim)
+        self._control_observation_buf = np.zeros(self._observation_dim)
+        self._pd_observation_buf = np.zeros(self._observation_dim)
+        self._blend_buf = np.empty(self._observation_dim)
+        self._chassis_link_ids = np.array([-1], dtype=np.int32)
+        self._leg_link_ids = np.array([], dtype=np.int32)
+        self._motor_link_ids = np.array([], dtype=np.int32)
+        self._foot_link_ids = np.array([], dtype=np.int32)
         self._motor_overheat_protection = False
         self._on_rack = False
         self._reset_at_current_position = False
@@ -167,15 +216,10 @@ class Minitaur(object):
             raise ValueError("on_rack and reset_at_current_position "
                              "cannot be enabled together")
 
-        if isinstance(self._motor_kp, (collections.Sequence, np.ndarray)):
-            self._motor_kps = np.asarray(self._motor_kp)
-        else:
-            self._motor_kps = np.full(self.num_motors, self._motor_kp)
-
-        if isinstance(self._motor_kd, (collections.Sequence, np.ndarray)):
-            self._motor_kds = np.asarray(self._motor_kd)
-        else:
-            self._motor_kds = np.full(self.num_motors, self._motor_kd)
+        # The gains are either a scalar or one value per motor; np.full
+        # broadcasts both to a per-motor array.
+        self._motor_kps = np.full(self.num_motors, self._motor_kp)
+        self._motor_kds = np.full(self.num_motors, self._motor_kd)
 
         self._motor_model = minitaur_motor.MotorModel(
             kp=self._motor_kp,
@@ -190,6 +234,7 @@ class Minitaur(object):
 
         if self._enable_action_filter:
             self._action_filter = self._build_action_filter()
+            self._action_filter_needs_init = True
 
         self._randomizers = []
         randomizer = controllable_env_randomizer_from_config.ControllableEnvRandomizerFromConfig(
@@ -201,21 +246,27 @@ class Minitaur(object):
     def init_robot(self, sim_handler):
         self._pybullet_client = sim_handler
         self._load_urdf(self._robot_index)
+        self._cache_joint_infos()
+        # Dynamics last applied by the set_* methods, keyed by method name. A
+        # freshly loaded URDF has none of them applied.
+        self._last_applied_dynamics = {}
+        _, self._init_orientation_inv = self._pybullet_client.invertTransform(
+            position=[0, 0, 0], orientation=self.get_default_init_ori())
+        self._default_init_pos_arr = np.asarray(
+            self.get_default_init_pos(), dtype=np.float64)
         if self._on_rack:
             self.rack_constraint = (
                 self._create_rack_constraint(self.get_default_init_pos(),
                                            self.get_default_init_ori()))
-        self._build_joint_name_to_dict()
-        self._build_urdf_ids()
+        self._scan_joints()
         self._remove_default_joint_damping()
         self._build_motor_id_list()
-        self._record_mass_from_urdf()
-        self._record_inertia_from_urdf()
+        self._record_dynamics_from_urdf()
         self.reset_pose(add_constraint=True)
 
         self._overheat_counter = np.zeros(self.num_motors)
-        self._motor_enabled_list = [True] * self.num_motors
-        self._observation_history.clear()
+        self._motor_enabled_list = np.ones(self.num_motors)
+        self._clear_observation_history()
         self.step_counter = 0
         self._state_action_counter = 0
         self._is_safe = True
@@ -243,9 +294,9 @@ class Minitaur(object):
             default pose is skipped.
         """
 
-        pos = copy.deepcopy(self.get_default_init_pos())
-        pos[0] -= int(self._robot_index/4)*2
-        pos[1] += (self._robot_index%4)*2
+        pos = self._default_init_pos_arr.copy()
+        pos[0] -= (self._robot_index // 4) * 2
+        pos[1] += (self._robot_index % 4) * 2
         ori = self.get_default_init_ori()
         self._pybullet_client.resetBasePositionAndOrientation(
             self.quadruped, pos, ori)
@@ -254,8 +305,8 @@ class Minitaur(object):
         self.reset_pose(add_constraint=False)
 
         self._overheat_counter = np.zeros(self.num_motors)
-        self._motor_enabled_list = [True] * self.num_motors
-        self._observation_history.clear()
+        self._motor_enabled_list = np.ones(self.num_motors)
+        self._clear_observation_history()
         self.step_counter = 0
         self._state_action_counter = 0
         self._is_safe = True
@@ -293,8 +344,8 @@ class Minitaur(object):
             self.step_counter += 1
 
     def get_obs(self):
-        for s in self.get_all_sensors():
-            s.on_step()
+        for on_step in self._sensor_on_step:
+            on_step()
         obs = self._get_observation()
         return obs
 
@@ -302,14 +353,23 @@ class Minitaur(object):
         pass
 
     def get_true_obs(self):
-        observation = []
-        observation.extend(self.get_true_motor_angles())
-        observation.extend(self.get_true_motor_vel())
-        observation.extend(self.get_true_motor_tau())
-        observation.extend(self.get_true_base_orientation())
-        observation.extend(self.get_true_base_rpy_rate())
+        observation = np.empty(self._observation_dim)
+        self._fill_true_obs(observation)
         return observation
 
+    def _fill_true_obs(self, observation):
+        """Writes the true observation into the given array.
+
+        Args:
+          observation: A 1D array of length 3 * num_motors + 7.
+        """
+        n = self.num_motors
+        self._compute_true_motor_angles(observation[0:n])
+        self._compute_true_motor_vel(observation[n:2 * n])
+        observation[2 * n:3 * n] = self.get_true_motor_tau()
+        observation[3 * n:3 * n + 4] = self.get_true_base_orientation()
+        observation[3 * n + 4:3 * n + 7] = self.get_true_base_rpy_rate()
+
     def receive_obs(self):
         """Receive the observation from sensors.
 
@@ -318,61 +378,101 @@ class Minitaur(object):
         """
         self._joint_states = self._pybullet_client.getJointStates(
             self.quadruped, self._motor_id_list)
+        joint_angles = self._joint_angle_buf
+        joint_velocities = self._joint_vel_buf
+        for i, state in enumerate(self._joint_states):
+            joint_angles[i] = state[0]
+            joint_velocities[i] = state[1]
         self._base_position, orientation = (
             self._pybullet_client.getBasePositionAndOrientation(self.quadruped))
         # Computes the relative orientation relative to the robot's
         # initial_orientation.
-        _, _init_orientation_inv = self._pybullet_client.invertTransform(
-            position=[0, 0, 0], orientation=self.get_default_init_ori())
         _, self._base_orientation = self._pybullet_client.multiplyTransforms(
             positionA=[0, 0, 0],
             orientationA=orientation,
             positionB=[0, 0, 0],
-            orientationB=_init_orientation_inv)
-        self._observation_history.appendleft(self.get_true_obs())
+            orientationB=self._init_orientation_inv)
+        self._observation_history_head = (
+            self._observation_history_head - 1) % OBSERVATION_HISTORY_LEN
+        self._fill_true_obs(
+            self._observation_history[self._observation_history_head])
+        self._observation_history_len = min(
+            self._observation_history_len + 1, OBSERVATION_HISTORY_LEN)
         self._control_observation = self._get_ctrl_obs()
         self.last_state_time = self._state_action_counter * self.time_step
 
-    def _get_delay_obs(self, latency):
+    def _get_delay_obs(self, latency, out):
         """Get observation that is delayed by the amount specified in latency.
 
+        When no interpolation is needed, the returned array is a view of a row
+        in the observation history, so callers must treat it as read-only.
+
         Args:
           latency: The latency (in seconds) of the delayed observation.
+          out: The array an interpolated observation is written into.
 
         Returns:
           observation: The observation which was actually latency seconds ago.
         """
-        if latency <= 0 or len(self._observation_history) == 1:
-            observation = self._observation_history[0]
+        if latency <= 0 or self._observation_history_len == 1:
+            return self._get_history_obs(0)
         else:
             n_steps_ago = int(latency / self.time_step)
-            if n_steps_ago + 1 >= len(self._observation_history):
-                return self._observation_history[-1]
+            if n_steps_ago + 1 >= self._observation_history_len:
+                return self._get_history_obs(self._observation_history_len - 1)
             remaining_latency = latency - n_steps_ago * self.time_step
             blend_alpha = remaining_latency / self.time_step
-            observation = (
-                (1.0 - blend_alpha) *
-                np.array(self._observation_history[n_steps_ago])
-                + blend_alpha * np.array(self._observation_history[n_steps_ago + 1]))
-        return observation
+            # out = (1 - alpha) * obs[n] + alpha * obs[n + 1], without temporaries.
+            np.multiply(self._get_history_obs(n_steps_ago), 1.0 - blend_alpha,
+                        out=out)
+            np.multiply(self._get_history_obs(n_steps_ago + 1), blend_alpha,
+                        out=self._blend_buf)
+            out += self._blend_buf
+        return out
+
+    def _get_history_obs(self, n_steps_ago):
+        """Returns the true observation recorded n_steps_ago control steps ago."""
+        return self._observation_history[
+            (self._observation_history_head + n_steps_ago) %
+            OBSERVATION_HISTORY_LEN]
+
+    def _clear_observation_history(self):
+        self._observation_history_head = 0
+        self._observation_history_len = 0
 
     def _get_pd_obs(self):
-        pd_delayed_observation = self._get_delay_obs(self._pd_latency)
+        pd_delayed_observation = self._get_delay_obs(
+            self._pd_latency, self._pd_observation_buf)
         q = pd_delayed_observation[0:self.num_motors]
         qdot = pd_delayed_observation[self.num_motors:2 * self.num_motors]
-        return (np.array(q), np.array(qdot))
+        return (q, qdot)
 
     def _get_ctrl_obs(self):
         control_delayed_observation = self._get_delay_obs(
-            self._control_latency)
+            self._control_latency, self._control_observation_buf)
         return control_delayed_observation
 
-    def _add_sensor_noise(self, sensor_values, noise_stdev):
+    def _add_sensor_noise(self, sensor_values, noise_stdev, out=None):
+        """Adds sensor noise, writing into out if given.
+
+        Without out, the noise-free reading is returned as is, which may be a
+        view of the observation history.
+        """
         if noise_stdev <= 0:
-            return sensor_values
-        observation = sensor_values + np.random.normal(
-            scale=noise_stdev, size=sensor_values.shape)
-        return observation
+            if out is None:
+                return sensor_values
+            out[:] = sensor_values
+            return out
+        if self._rng is None:
+            # Seeded from the global NumPy RNG so that np.random.seed() still
+            # makes the sensor noise reproducible. Deferred until noise is
+            # actually drawn so noise-free robots leave the global stream alone.
+            self._rng = np.random.default_rng(
+                np.random.randint(np.iinfo(np.int32).max))
+        noise = self._noise_buf[:len(sensor_values)]
+        self._rng.standard_normal(out=noise)
+        noise *= noise_stdev
+        return np.add(sensor_values, noise, out=out)
 
     def set_ctrl_latency(self, latency):
         """Set the latency of the control loop.
@@ -410,6 +510,18 @@ class Minitaur(object):
         for s in sensors:
             s.set_robot(self)
         self._sensors = sensors
+        # get_sensor returns the first sensor with a given name, while the
+        # observation keeps the last one, as a later sensor overwrites the
+        # entry of an earlier one with the same name.
+        self._sensor_by_name = {}
+        for s in sensors:
+            self._sensor_by_name.setdefault(s.get_name(), s)
+        observed_sensor_by_name = {s.get_name(): s for s in sensors}
+        # Observations are reported in sensor-name order, which only changes
+        # when the sensors do.
+        self._observed_sensors = tuple(
+            sorted(observed_sensor_by_name.items()))
+        self._sensor_on_step = [s.on_step for s in sensors]
 
     def get_all_sensors(self):
         """get all sensors associated with this robot.
@@ -430,10 +542,7 @@ class Minitaur(object):
         Returns:
           sensor: a sensor with the given name. None if not exists.
         """
-        for s in self._sensors:
-            if s.get_name() == name:
-                return s
-        return None
+        return self._sensor_by_name.get(name)
 
     def process_action(self, action, substep_count):
         """If enabled, interpolates between the current and previous actions.
@@ -446,14 +555,20 @@ class Minitaur(object):
           If interpolation is enabled, returns interpolated action depending on
           the current action repeat substep.
         """
-        if self._enable_action_interpolation:
+        if (self._enable_action_interpolation and
+                substep_count < self._action_repeat - 1):
+            # The last substep has a weight of 1 and reaches the action itself,
+            # so it falls through to the uninterpolated branch.
             if self._filter_action is not None:
                 prev_action = self._filter_action
             else:
                 prev_action = self.get_motor_angles()
 
-            lerp = float(substep_count + 1) / self._action_repeat
-            proc_action = prev_action + lerp * (action - prev_action)
+            lerp = self._lerp_table[substep_count]
+            proc_action = self._proc_action_buf
+            np.subtract(action, prev_action, out=proc_action)
+            proc_action *= lerp
+            proc_action += prev_action
         else:
             proc_action = action
 
@@ -469,14 +584,15 @@ class Minitaur(object):
           add_constraint: Whether to add a constraint at the joints of two feet.
         """
         del add_constraint
-        for name in self._joint_name_to_id:
-            joint_id = self._joint_name_to_id[name]
-            self.pybullet_client.setJointMotorControl2(
-                bodyIndex=self.quadruped,
-                jointIndex=(joint_id),
-                controlMode=self.pybullet_client.VELOCITY_CONTROL,
-                targetVelocity=0,
-                force=0)
+        # Turn off the default velocity motors of all joints in one call.
+        joint_ids = list(self._joint_name_to_id.values())
+        num_joints = len(joint_ids)
+        self.pybullet_client.setJointMotorControlArray(
+            bodyIndex=self.quadruped,
+            jointIndices=joint_ids,
+            controlMode=self.pybullet_client.VELOCITY_CONTROL,
+            targetVelocities=[0] * num_joints,
+            forces=[0] * num_joints)
         for name, i in zip(self.name_motor, range(len(self.name_motor))):
             angle = self._init_motor_angle[i] + self._motor_offset[i]
             self.pybullet_client.resetJointState(
@@ -506,9 +622,7 @@ class Minitaur(object):
           A tuple (roll, pitch, yaw) of the base in world frame.
         """
         orientation = self.get_true_base_orientation()
-        roll_pitch_yaw = self._pybullet_client.getEulerFromQuaternion(
-            orientation)
-        return np.asarray(roll_pitch_yaw)
+        return self._pybullet_client.getEulerFromQuaternion(orientation)
 
     def get_base_rpy(self):
         """Get minitaur's base orientation in euler angle in the world frame.
@@ -518,10 +632,11 @@ class Minitaur(object):
           A tuple (roll, pitch, yaw) of the base in world frame polluted by noise
           and latency.
         """
-        delayed_orientation = np.array(
-            self._control_observation[3 * self.num_motors:3 * self.num_motors + 4])
+        delayed_orientation = self._control_observation[
+            3 * self.num_motors:3 * self.num_motors + 4]
+        # pybullet parses a list of floats much faster than an ndarray.
         delayed_roll_pitch_yaw = self._pybullet_client.getEulerFromQuaternion(
-            delayed_orientation)
+            delayed_orientation.tolist())
         roll_pitch_yaw = self._add_sensor_noise(
             np.array(delayed_roll_pitch_yaw), self._observation_noise_stdev[3])
         return roll_pitch_yaw
@@ -532,25 +647,23 @@ class Minitaur(object):
         Returns:
           observations: sensory observation in the numpy array format
         """
-        sensors_dict = {}
-        for s in self.get_all_sensors():
-            sensors_dict[s.get_name()] = s.get_observation()
-
-        observations = collections.OrderedDict(
-            sorted(list(sensors_dict.items())))
+        observations = {name: s.get_observation()
+                        for name, s in self._observed_sensors}
         return observations
 
+    def _compute_true_motor_angles(self, out):
+        """Writes the current motor angles into out and returns it."""
+        np.subtract(self._joint_angle_buf, self._motor_offset, out=out)
+        np.multiply(out, self._motor_direction, out=out)
+        return out
+
     def get_true_motor_angles(self):
         """Gets the eight motor angles at the current moment, mapped to [-pi, pi].
 
         Returns:
           Motor angles, mapped to [-pi, pi].
         """
-        motor_angles = [state[0] for state in self._joint_states]
-        motor_angles = np.multiply(
-            np.asarray(motor_angles) - np.asarray(self._motor_offset),
-            self._motor_direction)
-        return motor_angles
+        return self._compute_true_motor_angles(np.empty(self.num_motors))
 
     def get_motor_angles(self):
         """Gets the eight motor angles.
@@ -562,20 +675,21 @@ class Minitaur(object):
           Motor angles polluted by noise and latency, mapped to [-pi, pi].
         """
         motor_angles = self._add_sensor_noise(
-            np.array(self._control_observation[0:self.num_motors]),
+            self._control_observation[0:self.num_motors],
             self._observation_noise_stdev[0])
         return pose3d.MapToMinusPiToPi(motor_angles)
 
+    def _compute_true_motor_vel(self, out):
+        """Writes the current motor velocities into out and returns it."""
+        return np.multiply(self._joint_vel_buf, self._motor_direction, out=out)
+
     def get_true_motor_vel(self):
         """Get the velocity of all eight motors.
 
         Returns:
           Velocities of all eight motors.
         """
-        motor_velocities = [state[1] for state in self._joint_states]
-
-        motor_velocities = np.multiply(motor_velocities, self._motor_direction)
-        return motor_velocities
+        return self._compute_true_motor_vel(np.empty(self.num_motors))
 
     def get_motor_vel(self):
         """Get the velocity of all eight motors.
@@ -585,9 +699,8 @@ class Minitaur(object):
           Velocities of all eight motors polluted by noise and latency.
         """
         return self._add_sensor_noise(
-            np.array(self._control_observation[self.num_motors:2 *
-                                               self.num_motors]),
-            self._observation_noise_stdev[1])
+            self._control_observation[self.num_motors:2 * self.num_motors],
+            self._observation_noise_stdev[1], out=np.empty(self.num_motors))
 
     def get_true_motor_tau(self):
         """Get the amount of torque the motors are exerting.
@@ -605,9 +718,8 @@ class Minitaur(object):
           Motor torques of all eight motors polluted by noise and latency.
         """
         return self._add_sensor_noise(
-            np.array(self._control_observation[2 * self.num_motors:3 *
-                                               self.num_motors]),
-            self._observation_noise_stdev[2])
+            self._control_observation[2 * self.num_motors:3 * self.num_motors],
+            self._observation_noise_stdev[2], out=np.empty(self.num_motors))
 
     def get_energy_consumption_per_step(self):
         """Get the amount of energy used in last one time step.
@@ -615,9 +727,17 @@ class Minitaur(object):
         Returns:
           Energy Consumption based on motor velocities and torques (Nm^2/s).
         """
-        return np.abs(np.dot(
-            self.get_motor_tau(),
-            self.get_motor_vel())) * self.time_step * self._action_repeat
+        # The dot product is a numpy scalar, so the builtin abs avoids a ufunc
+        # call. Without sensor noise both readings are views of the control
+        # observation and nothing is allocated.
+        n = self.num_motors
+        motor_tau = self._add_sensor_noise(
+            self._control_observation[2 * n:3 * n],
+            self._observation_noise_stdev[2])
+        motor_vel = self._add_sensor_noise(
+            self._control_observation[n:2 * n],
+            self._observation_noise_stdev[1])
+        return abs(np.dot(motor_tau, motor_vel)) * self._control_time_step
 
     def get_true_base_orientation(self):
         """Get the orientation of minitaur's base, represented as quaternion.
@@ -632,10 +752,19 @@ class Minitaur(object):
 
         This function mimicks the noisy sensor reading and adds latency.
         Returns:
-          The orientation of minitaur's base polluted by noise and latency.
+          The orientation of minitaur's base polluted by noise and latency. Without
+          noise the quaternion is standardized to w >= 0.
         """
+        if self._observation_noise_stdev[3] <= 0:
+            # Without noise the euler round trip renormalizes the delayed
+            # (possibly interpolated) quaternion and picks one of q and -q;
+            # do the same directly, taking the w >= 0 representative.
+            delayed_orientation = self._control_observation[
+                3 * self.num_motors:3 * self.num_motors + 4]
+            return pose3d.standardize_quaternion(
+                delayed_orientation / np.linalg.norm(delayed_orientation))
         return self._pybullet_client.getQuaternionFromEuler(
-            self.get_base_rpy())
+            self.get_base_rpy().tolist())
 
     def get_true_base_rpy_rate(self):
         """Get the rate of orientation change of the minitaur's base in euler angle.
@@ -659,17 +788,9 @@ class Minitaur(object):
         Returns:
           angular velocity of based on the given orientation.
         """
-        # Treat angular velocity as a position vector, then transform based on the
-        # orientation given by dividing (or multiplying with inverse).
-        # Get inverse quaternion assuming the vector is at 0,0,0 origin.
-        _, orientation_inversed = self._pybullet_client.invertTransform([0, 0, 0],
-                                                                        orientation)
-        # Transform the angular_velocity at neutral orientation using a neutral
-        # translation and reverse of the given orientation.
-        relative_velocity, _ = self._pybullet_client.multiplyTransforms(
-            [0, 0, 0], orientation_inversed, angular_velocity,
-            self._pybullet_client.getQuaternionFromEuler([0, 0, 0]))
-        return np.asarray(relative_velocity)
+        # Treat angular velocity as a position vector, then rotate it by the
+        # inverse of the given orientation.
+        return pose3d.QuaternionInverseRotatePoint(angular_velocity, orientation)
 
     def get_base_rpy_rate(self):
         """Get the rate of orientation change of the minitaur's base in euler angle.
@@ -680,9 +801,9 @@ class Minitaur(object):
           and latency.
         """
         return self._add_sensor_noise(
-            np.array(self._control_observation[3 * self.num_motors +
-                                               4:3 * self.num_motors + 7]),
-            self._observation_noise_stdev[4])
+            self._control_observation[3 * self.num_motors + 4:
+                                      3 * self.num_motors + 7],
+            self._observation_noise_stdev[4], out=np.empty(3))
 
     def get_action_dim(self):
         """Get the length of the action list.
@@ -694,14 +815,14 @@ class Minitaur(object):
 
     def _apply_overheat_protection(self, actual_torque):
         if self._motor_overheat_protection:
-            for i in range(self.num_motors):
-                if abs(actual_torque[i]) > self._overheat_shutdown_tau:
-                    self._overheat_counter[i] += 1
-                else:
-                    self._overheat_counter[i] = 0
-                if (self._overheat_counter[i] >
-                        self._overheat_shutdown_time / self.time_step):
-                    self._motor_enabled_list[i] = False
+            overheated = self._overheat_mask_buf
+            np.greater(np.abs(actual_torque, out=self._overheat_tau_buf),
+                       self._overheat_shutdown_tau, out=overheated)
+            self._overheat_counter += 1
+            self._overheat_counter *= overheated
+            self._motor_enabled_list *= np.less_equal(
+                self._overheat_counter, self._overheat_limit_steps,
+                out=overheated)
 
     def _clip_motor_commands(self, motor_commands):
         """Clips motor commands.
@@ -717,10 +838,12 @@ class Minitaur(object):
         # clamp the motor command by the joint limit, in case weired things happens
         max_angle_change = self._max_motor_angle_step
         current_motor_angles = self.get_motor_angles()
-        motor_commands = np.clip(motor_commands,
-                                 current_motor_angles - max_angle_change,
-                                 current_motor_angles + max_angle_change)
-        return motor_commands
+        lower = np.subtract(current_motor_angles, max_angle_change,
+                            out=self._motor_command_lower_buf)
+        upper = np.add(current_motor_angles, max_angle_change,
+                       out=self._motor_command_upper_buf)
+        return np.clip(motor_commands, lower, upper,
+                       out=self._motor_command_buf)
 
     def apply_action(self, motor_commands, motor_control_mode=None):
         """Apply the motor commands using the motor model.
@@ -737,10 +860,10 @@ class Minitaur(object):
         if control_mode is None:
             control_mode = self._motor_control_mode
 
-        motor_commands = np.asarray(motor_commands)
-
         q, qdot = self._get_pd_obs()
-        qdot_true = self.get_true_motor_vel()
+        qdot_true = self._compute_true_motor_vel(self._motor_vel_buf)
+        # _clip_motor_commands already returns an ndarray, and the motor model
+        # returns ndarray torques, so nothing below needs converting.
         actual_torque, observed_torque = self._motor_model.convert_to_torque(
             motor_commands, q, qdot, qdot_true, control_mode)
 
@@ -752,116 +875,111 @@ class Minitaur(object):
         self._observed_motor_torques = observed_torque
 
         # Transform into the motor space when applying the torque.
-        self._applied_motor_torque = np.multiply(actual_torque,
-                                                 self._motor_direction)
-        motor_ids = []
-        motor_torques = []
-
-        for motor_id, motor_torque, motor_enabled in zip(self._motor_id_list,
-                                                         self._applied_motor_torque,
-                                                         self._motor_enabled_list):
-            if motor_enabled:
-                motor_ids.append(motor_id)
-                motor_torques.append(motor_torque)
-            else:
-                motor_ids.append(motor_id)
-                motor_torques.append(0)
-        self._set_motor_tau_by_ids(motor_ids, motor_torques)
-
-    def _record_mass_from_urdf(self):
-        """Records the mass information from the URDF file."""
-        self._base_mass_urdf = []
-        for chassis_id in self._chassis_link_ids:
-            self._base_mass_urdf.append(
-                self._pybullet_client.getDynamicsInfo(self.quadruped, chassis_id)[0])
-        self._leg_masses_urdf = []
-        for leg_id in self._leg_link_ids:
-            self._leg_masses_urdf.append(
-                self._pybullet_client.getDynamicsInfo(self.quadruped, leg_id)[0])
-        for motor_id in self._motor_link_ids:
-            self._leg_masses_urdf.append(
-                self._pybullet_client.getDynamicsInfo(self.quadruped, motor_id)[0])
-
-    def _record_inertia_from_urdf(self):
-        """Record the inertia of each body from URDF file."""
-        self._link_urdf = []
-        num_bodies = self._pybullet_client.getNumJoints(self.quadruped)
-        for body_id in range(-1, num_bodies):  # -1 is for the base link.
-            inertia = self._pybullet_client.getDynamicsInfo(self.quadruped,
-                                                            body_id)[2]
-            self._link_urdf.append(inertia)
-        # We need to use id+1 to index self._link_urdf because it has the base
+        np.multiply(actual_torque, self._motor_direction,
+                    out=self._applied_motor_torque)
+        # Disabled motors get zero torque. The enabled list is a float64 0/1 mask
+        # so this multiply needs no dtype cast.
+        motor_torques = np.multiply(self._applied_motor_torque,
+                                    self._motor_enabled_list,
+                                    out=self._motor_torque_buf)
+        self._set_motor_tau_by_ids(self._motor_id_list, motor_torques.tolist())
+
+    def _record_dynamics_from_urdf(self):
+        """Records the mass and inertia of each body from the URDF file.
+
+        Each body is queried with a single getDynamicsInfo call, and the base,
+        leg and motor values are then gathered from the per-body arrays.
+        """
+        num_bodies = self._num_joints
+        # We need to use id+1 to index these arrays because they have the base
         # (index = -1) at the first element.
-        self._base_inertia_urdf = [
-            self._link_urdf[chassis_id + 1] for chassis_id in self._chassis_link_ids
+        link_masses = np.empty(num_bodies + 1)
+        link_inertias = np.empty((num_bodies + 1, 3))
+        for body_id in range(-1, num_bodies):
+            dynamics_info = self._pybullet_client.getDynamicsInfo(
+                self.quadruped, body_id)
+            link_masses[body_id + 1] = dynamics_info[0]
+            link_inertias[body_id + 1] = dynamics_info[2]
+        self._link_urdf = link_inertias
+
+        chassis_index = self._chassis_link_ids + 1
+        leg_index = np.concatenate(
+            (self._leg_link_ids, self._motor_link_ids)) + 1
+        self._base_mass_urdf = link_masses[chassis_index]
+        self._leg_masses_urdf = link_masses[leg_index]
+        self._base_inertia_urdf = link_inertias[chassis_index]
+        self._leg_inertia_urdf = link_inertias[leg_index]
+
+    def _cache_joint_infos(self):
+        """Queries the joint infos of the loaded URDF once and caches them."""
+        self._num_joints = self._pybullet_client.getNumJoints(self.quadruped)
+        self._all_joint_infos = [
+            self._pybullet_client.getJointInfo(self.quadruped, i)
+            for i in range(self._num_joints)
         ]
-        self._leg_inertia_urdf = [
-            self._link_urdf[leg_id + 1] for leg_id in self._leg_link_ids
-        ]
-        self._leg_inertia_urdf.extend(
-            [self._link_urdf[motor_id + 1] for motor_id in self._motor_link_ids])
 
-    def _build_joint_name_to_dict(self):
-        num_joints = self._pybullet_client.getNumJoints(self.quadruped)
-        self._joint_name_to_id = {}
-        for i in range(num_joints):
-            joint_info = self._pybullet_client.getJointInfo(self.quadruped, i)
-            self._joint_name_to_id[joint_info[1].decode(
-                "UTF-8")] = joint_info[0]
+    def _scan_joints(self):
+        """Build the joint name map and the link Ids in one pass over the joints.
 
-    def _build_urdf_ids(self):
-        """Build the link Ids from its name in the URDF file.
+        The robot's pattern is a tuple of compiled regexes ordered as
+        (chassis, motor, knee, foot).
 
         Raises:
           ValueError: Unknown category of the joint name.
         """
-        num_joints = self._pybullet_client.getNumJoints(self.quadruped)
-        self._chassis_link_ids = [-1]
-        self._leg_link_ids = []
-        self._motor_link_ids = []
-        self._knee_link_ids = []
-        self._foot_link_ids = []
-
-        for i in range(num_joints):
-            joint_info = self._pybullet_client.getJointInfo(self.quadruped, i)
+        self._joint_name_to_id = {}
+        chassis_link_ids = [-1]
+        motor_link_ids = []
+        knee_link_ids = []
+        foot_link_ids = []
+
+        is_chassis, is_motor, is_knee, is_foot = (
+            pattern.match for pattern in self.pattern)
+        for joint_info in self._all_joint_infos:
             joint_name = joint_info[1].decode("UTF-8")
-            joint_id = self._joint_name_to_id[joint_name]
-            if self.pattern[0].match(joint_name):
-                self._chassis_link_ids.append(joint_id)
-            elif self.pattern[1].match(joint_name):
-                self._motor_link_ids.append(joint_id)
+            joint_id = joint_info[0]
+            self._joint_name_to_id[joint_name] = joint_id
+            if is_chassis(joint_name):
+                chassis_link_ids.append(joint_id)
+            elif is_motor(joint_name):
+                motor_link_ids.append(joint_id)
             # We either treat the lower leg or the toe as the foot link, depending on
             # the urdf version used.
-            elif self.pattern[2].match(joint_name):
-                self._knee_link_ids.append(joint_id)
-            elif self.pattern[3].match(joint_name):
-                self._foot_link_ids.append(joint_id)
+            elif is_knee(joint_name):
+                knee_link_ids.append(joint_id)
+            elif is_foot(joint_name):
+                foot_link_ids.append(joint_id)
             else:
                 raise ValueError("Unknown category of joint %s" % joint_name)
 
-        self._leg_link_ids.extend(self._knee_link_ids)
-        self._leg_link_ids.extend(self._foot_link_ids)
-        self._foot_link_ids.extend(self._knee_link_ids)
-
-        self._chassis_link_ids.sort()
-        self._motor_link_ids.sort()
-        self._foot_link_ids.sort()
-        self._leg_link_ids.sort()
+        # Sorted int arrays, so that per-link data can be gathered by fancy
+        # indexing. Both the leg links and the foot links are the knees plus the
+        # toes, so that set is sorted once.
+        leg_link_ids = np.sort(
+            np.asarray(knee_link_ids + foot_link_ids, dtype=np.int32))
+        self._chassis_link_ids = np.sort(
+            np.asarray(chassis_link_ids, dtype=np.int32))
+        self._motor_link_ids = np.sort(
+            np.asarray(motor_link_ids, dtype=np.int32))
+        self._knee_link_ids = np.asarray(knee_link_ids, dtype=np.int32)
+        self._leg_link_ids = leg_link_ids
+        self._foot_link_ids = leg_link_ids.copy()
 
         return
 
     def _remove_default_joint_damping(self):
-        num_joints = self._pybullet_client.getNumJoints(self.quadruped)
-        for i in range(num_joints):
-            joint_info = self._pybullet_client.getJointInfo(self.quadruped, i)
-            self._pybullet_client.changeDynamics(
-                joint_info[0], -1, linearDamping=0, angularDamping=0)
+        # pybullet has no batched changeDynamics, so this stays one call per
+        # joint. The joint index of each cached joint info is its position.
+        change_dynamics = self._pybullet_client.changeDynamics
+        for joint_index in range(self._num_joints):
+            change_dynamics(joint_index, -1, linearDamping=0, angularDamping=0)
 
     def _build_motor_id_list(self):
-        self._motor_id_list = [
-            self._joint_name_to_id[motor_name]
-            for motor_name in self._get_motor_names()
-        ]
+        # An immutable tuple of plain ints, passed straight to the batched
+        # pybullet joint calls on every step.
+        self._motor_id_list = tuple(
+            int(self._joint_name_to_id[motor_name])
+            for motor_name in self._get_motor_names())
 
     def _create_rack_constraint(self, init_position, init_orientation):
         """Create a constraint that keeps the chassis at a fixed frame.
@@ -890,9 +1008,8 @@ class Minitaur(object):
 
     def _load_urdf(self, robot_index=0):
         laikago_urdf_path = self.get_urdf_file()
-        pos = copy.deepcopy(self.get_default_init_pos())
-        pos[0] -= int(robot_index/4)*2
-        pos[1] += (robot_index%4)*2
+        x, y, z = self.get_default_init_pos()
+        pos = (x - (robot_index // 4) * 2, y + (robot_index % 4) * 2, z)
         ori = self.get_default_init_ori()
         if self._self_collision_enabled:
             self.quadruped = self._pybullet_client.loadURDF(
@@ -902,13 +1019,6 @@ class Minitaur(object):
             self.quadruped = self._pybullet_client.loadURDF(
                 laikago_urdf_path, pos, ori)
 
-    def _set_motor_tau_by_id(self, motor_id, torque):
-        self._pybullet_client.setJointMotorControl2(
-            bodyIndex=self.quadruped,
-            jointIndex=motor_id,
-            controlMode=self._pybullet_client.TORQUE_CONTROL,
-            force=torque)
-
     def _set_motor_tau_by_ids(self, motor_ids, torques):
         self._pybullet_client.setJointMotorControlArray(
             bodyIndex=self.quadruped,
@@ -932,6 +1042,25 @@ class Minitaur(object):
         """Get the inertia of the legs from the URDF file."""
         return self._leg_inertia_urdf
 
+    def _is_dynamics_unchanged(self, name, value):
+        """Checks whether value is the one last applied by the named setter.
+
+        If it is not, value is recorded as the last applied one.
+
+        Args:
+          name: The name of the dynamics property.
+          value: The value about to be applied.
+
+        Returns:
+          True if value equals the last applied value and the changeDynamics
+          calls can be skipped.
+        """
+        last_value = self._last_applied_dynamics.get(name)
+        if last_value is not None and np.array_equal(last_value, value):
+            return True
+        self._last_applied_dynamics[name] = np.array(value)
+        return False
+
     def set_base_mass(self, base_mass):
         """Set the mass of minitaur's base.
 
@@ -947,6 +1076,8 @@ class Minitaur(object):
             raise ValueError(
                 "The length of base_mass {} and self._chassis_link_ids {} are not "
                 "the same.".format(len(base_mass), len(self._chassis_link_ids)))
+        if self._is_dynamics_unchanged("base_mass", base_mass):
+            return
         for chassis_id, chassis_mass in zip(self._chassis_link_ids, base_mass):
             self._pybullet_client.changeDynamics(
                 self.quadruped, chassis_id, mass=chassis_mass)
@@ -968,6 +1099,8 @@ class Minitaur(object):
         if len(leg_masses) != len(self._leg_link_ids) + len(self._motor_link_ids):
             raise ValueError("The number of values passed to set_leg_mass are "
                              "different than number of leg links and motors.")
+        if self._is_dynamics_unchanged("leg_mass", leg_masses):
+            return
         for leg_id, leg_mass in zip(self._leg_link_ids, leg_masses):
             self._pybullet_client.changeDynamics(
                 self.quadruped, leg_id, mass=leg_mass)
@@ -994,12 +1127,12 @@ class Minitaur(object):
                 "The length of base_inertias {} and self._chassis_link_ids {} are "
                 "not the same.".format(
                     len(base_inertias), len(self._chassis_link_ids)))
+        if (np.asarray(base_inertias) < 0).any():
+            raise ValueError("Values in inertia matrix should be non-negative.")
+        if self._is_dynamics_unchanged("base_inertia", base_inertias):
+            return
         for chassis_id, chassis_inertia in zip(self._chassis_link_ids,
                                                base_inertias):
-            for inertia_value in chassis_inertia:
-                if (np.asarray(inertia_value) < 0).any():
-                    raise ValueError(
-                        "Values in inertia matrix should be non-negative.")
             self._pybullet_client.changeDynamics(
                 self.quadruped, chassis_id, localInertiaDiagonal=chassis_inertia)
 
@@ -1021,20 +1154,16 @@ class Minitaur(object):
         if len(leg_inertias) != len(self._leg_link_ids) + len(self._motor_link_ids):
             raise ValueError("The number of values passed to set_leg_mass are "
                              "different than number of leg links and motors.")
+        if (np.asarray(leg_inertias) < 0).any():
+            raise ValueError("Values in inertia matrix should be non-negative.")
+        if self._is_dynamics_unchanged("leg_inertia", leg_inertias):
+            return
         for leg_id, leg_inertia in zip(self._leg_link_ids, leg_inertias):
-            for inertia_value in leg_inertias:
-                if (np.asarray(inertia_value) < 0).any():
-                    raise ValueError(
-                        "Values in inertia matrix should be non-negative.")
             self._pybullet_client.changeDynamics(
                 self.quadruped, leg_id, localInertiaDiagonal=leg_inertia)
 
         motor_inertias = leg_inertias[len(self._leg_link_ids):]
         for link_id, motor_inertia in zip(self._motor_link_ids, motor_inertias):
-            for inertia_value in motor_inertias:
-                if (np.asarray(inertia_value) < 0).any():
-                    raise ValueError(
-                        "Values in inertia matrix should be non-negative.")
             self._pybullet_client.changeDynamics(
                 self.quadruped, link_id, localInertiaDiagonal=motor_inertia)
 
@@ -1045,6 +1174,8 @@ class Minitaur(object):
           foot_friction: The lateral friction coefficient of the foot. This value is
             shared by all four feet.
         """
+        if self._is_dynamics_unchanged("foot_friction", foot_friction):
+            return
         for link_id in self._foot_link_ids:
             self._pybullet_client.changeDynamics(
                 self.quadruped, link_id, lateralFriction=foot_friction)
@@ -1056,18 +1187,33 @@ class Minitaur(object):
           foot_restitution: The coefficient of restitution (bounciness) of the feet.
             This value is shared by all four feet.
         """
+        if self._is_dynamics_unchanged("foot_restitution", foot_restitution):
+            return
         for link_id in self._foot_link_ids:
             self._pybullet_client.changeDynamics(
                 self.quadruped, link_id, restitution=foot_restitution)
 
     def set_joint_friction(self, joint_frictions):
-        for knee_joint_id, friction in zip(self._foot_link_ids, joint_frictions):
-            self._pybullet_client.setJointMotorControl2(
-                bodyIndex=self.quadruped,
-                jointIndex=knee_joint_id,
-                controlMode=self._pybullet_client.VELOCITY_CONTROL,
-                targetVelocity=0,
-                force=friction)
+        """Set the friction of the knee joints.
+
+        Args:
+          joint_frictions: A list of friction forces, one per knee joint.
+
+        Raises:
+          ValueError: It is raised when the length of joint_frictions is not the
+            same as the number of knee joints.
+        """
+        num_knee_joints = len(self._foot_link_ids)
+        if len(joint_frictions) != num_knee_joints:
+            raise ValueError(
+                "The length of joint_frictions {} and self._foot_link_ids {} are "
+                "not the same.".format(len(joint_frictions), num_knee_joints))
+        self._pybullet_client.setJointMotorControlArray(
+            bodyIndex=self.quadruped,
+            jointIndices=self._foot_link_ids,
+            controlMode=self._pybullet_client.VELOCITY_CONTROL,
+            targetVelocities=[0] * num_knee_joints,
+            forces=list(joint_frictions))
 
     def get_num_knee_joints(self):
         return len(self._foot_link_ids)
@@ -1088,15 +1234,10 @@ class Minitaur(object):
           kp: proportional gain(s) of the motors.
           kd: derivative gain(s) of the motors.
         """
-        if isinstance(kp, (collections.Sequence, np.ndarray)):
-            self._motor_kps = np.asarray(kp)
-        else:
-            self._motor_kps = np.full(self.num_motors, kp)
-
-        if isinstance(kd, (collections.Sequence, np.ndarray)):
-            self._motor_kds = np.asarray(kd)
-        else:
-            self._motor_kds = np.full(self.num_motors, kd)
+        kps = np.asarray(kp)
+        self._motor_kps = kps if kps.ndim else np.full(self.num_motors, kp)
+        kds = np.asarray(kd)
+        self._motor_kds = kds if kds.ndim else np.full(self.num_motors, kd)
 
         self._motor_model.set_motor_gains(kp, kd)
 
@@ -1131,7 +1272,7 @@ class Minitaur(object):
         Args:
           ratio: The relative strength. A scalar range from 0.0 to 1.0.
         """
-        self._motor_model.set_strength_ratios([ratio] * self.num_motors)
+        self._motor_model.set_strength_ratios(np.full(self.num_motors, ratio))
 
     def set_motor_strength_ratios(self, ratios):
         """Set the strength of each motor relative to the default value.
@@ -1151,6 +1292,11 @@ class Minitaur(object):
         """
         self.time_step = simulation_step
         self._action_repeat = action_repeat
+        self._overheat_limit_steps = (
+            self._overheat_shutdown_time / self.time_step)
+        self._lerp_table = (np.arange(1, self._action_repeat + 1) /
+                            self._action_repeat)
+        self._control_time_step = self.time_step * self._action_repeat
 
     def _get_motor_names(self):
         return self.name_motor
@@ -1164,15 +1310,17 @@ class Minitaur(object):
 
     def _reset_action_filter(self):
         self._action_filter.reset()
+        self._action_filter_needs_init = True
         return
 
     def _filter(self, action):
         # initialize the filter history, since resetting the filter will fill
         # the history with zeros and this can cause sudden movements at the start
-        # of each episode
-        if self._state_action_counter == 0:
-            default_action = self.get_motor_angles()
-            self._action_filter.init_history(default_action)
+        # of each episode. This waits for the first action because the task may
+        # still move the robot and receive observations after the robot reset.
+        if self._action_filter_needs_init:
+            self._action_filter.init_history(self.get_motor_angles())
+            self._action_filter_needs_init = False
 
         filtered_action = self._action_filter.filter(action)
         return filtered_action
@@ -1188,10 +1336,11 @@ class Minitaur(object):
         return self._init_quat
 
     def get_default_init_joint_pos(self):
-        """Get default initial joint pose."""
-        joint_pose = (self._init_motor_angle +
-                      self._motor_offset) * self._motor_direction
-        return joint_pose
+        """Get default initial joint pose.
+
+        The returned array is cached and read-only.
+        """
+        return self._default_init_joint_pos
 
     @property
     def pybullet_client(self):
@@ -15,7 +15,7 @@
 
 """Motor model for laikago."""
 
-import collections
+import collections.abc
 import numpy as np
 
 
@@ -60,7 +60,7 @@ class MotorModel(object):
     self._kd = kd
     self._torque_limits = torque_limits
     if torque_limits is not None:
-      if isinstance(torque_limits, (collections.Sequence, np.ndarray)):
+      if isinstance(torque_limits, (collections.abc.Sequence, np.ndarray)):
         self._torque_limits = np.asarray(torque_limits)
       else:
         self._torque_limits = np.full(NUM_MOTORS, torque_limits)
@@ -74,7 +74,7 @@ class MotorModel(object):
       ratios: The relative strength of motor output. A numpy array ranging from
         0.0 to 1.0.
     """
-    self._strength_ratios = ratios
+    self._strength_ratios = np.asarray(ratios)
 
   def set_motor_gains(self, kp, kd):
     """Set the gains of all motors.
@@ -122,8 +122,9 @@ class MotorModel(object):
       motor_control_mode: A MotorControlMode enum.
 
     Returns:
-      actual_torque: The torque that needs to be applied to the motor.
-      observed_torque: The torque observed by the sensor.
+      actual_torque: The torque that needs to be applied to the motor, as a
+        numpy array.
+      observed_torque: The torque observed by the sensor, as a numpy array.
     """
     del true_motor_velocity
     if not motor_control_mode:
@@ -13,7 +13,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import copy
 import math
 from absl import logging
 import numpy as np
@@ -231,6 +230,29 @@ def QuaternionRotatePoint(point, quat):
   return q_point_rotated[:3]
 
 
+def QuaternionInverseRotatePoint(point, quat):
+  """Rotates the point by the inverse of a unit quaternion.
+
+  Uses v' = v + w * t + u x t with t = 2 * u x v, where (u, w) is the
+  conjugate of quat, so no quaternion products or arrays are built.
+
+  Args:
+    point: The point to be rotated.
+    quat: The unit quaternion [x, y, z, w] whose inverse is applied.
+
+  Returns:
+    A 3D vector in a numpy array.
+  """
+  px, py, pz = point[0], point[1], point[2]
+  ux, uy, uz, w = -quat[0], -quat[1], -quat[2], quat[3]
+  tx = 2.0 * (uy * pz - uz * py)
+  ty = 2.0 * (uz * px - ux * pz)
+  tz = 2.0 * (ux * py - uy * px)
+  return np.array([px + w * tx + (uy * tz - uz * ty),
+                   py + w * ty + (uz * tx - ux * tz),
+                   pz + w * tz + (ux * ty - uy * tx)])
+
+
 def IsRotationMatrix(m):
   """Returns true if the 3x3 submatrix represents a rotation.
 
@@ -359,16 +381,18 @@ def MapToMinusPiToPi(angles):
     """Maps a list of angles to [-pi, pi].
 
     Args:
-      angles: A list of angles in rad.
+      angles: A list or numpy array of angles in rad.
 
     Returns:
-      A list of angle mapped to [-pi, pi].
+      A numpy array of the angles mapped to [-pi, pi].
     """
-    mapped_angles = copy.deepcopy(angles)
-    for i in range(len(angles)):
-        mapped_angles[i] = math.fmod(angles[i], 2 * math.pi)
-        if mapped_angles[i] >= math.pi:
-            mapped_angles[i] -= 2 * math.pi
-        elif mapped_angles[i] < -math.pi:
-            mapped_angles[i] += 2 * math.pi
-    return mapped_angles
\ No newline at end of file
+    mapped_angles = np.fmod(angles, 2 * math.pi)
+    if not mapped_angles.size:
+        return mapped_angles
+    # Most angles, such as motor angles, are already in range, so the masked
+    # corrections only run when a min/max check finds one that is not.
+    if mapped_angles.max() >= math.pi:
+        mapped_angles -= (mapped_angles >= math.pi) * (2 * math.pi)
+    if mapped_angles.min() < -math.pi:
+        mapped_angles += (mapped_angles < -math.pi) * (2 * math.pi)
+    return mapped_angles
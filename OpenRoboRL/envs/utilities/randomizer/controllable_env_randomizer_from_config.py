@@ -19,7 +19,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import copy
 import functools
 
 import numpy as np
@@ -30,6 +29,27 @@ from envs.utilities.randomizer import minitaur_env_randomizer_config
 
 SIMULATION_TIME_STEP = 0.001
 NUM_LEGS = 4
+# Number of candidate parameter sets drawn at once when rejection ranges are
+# configured.
+REJECTION_SAMPLING_BATCH_SIZE = 64
+# Number of batches drawn before the rejection ranges are deemed to cover the
+# whole sample space.
+MAX_REJECTION_SAMPLING_BATCHES = 1000
+# Parameters whose randomized value is passed as is to a single robot setter.
+# Maps the parameter name to (setter name, vector length getter or None for a
+# scalar, log name).
+DIRECT_SETTER_PARAMS = {
+    "latency": ("set_ctrl_latency", None, "control latency"),
+    "joint friction": ("set_joint_friction",
+                       lambda robot: robot.get_num_knee_joints(),
+                       "joint friction"),
+    "motor friction": ("set_motor_viscous_damping", None, "motor friction"),
+    "restitution": ("set_foot_restitution", None, "foot restitution"),
+    "lateral friction": ("set_foot_friction", None, "foot friction"),
+    "battery": ("set_battery_voltage", None, "battery voltage"),
+    "motor strength": ("set_motor_strength_ratios",
+                       lambda robot: robot.num_motors, "motor strength"),
+}
 
 
 class ControllableEnvRandomizerFromConfig(
@@ -48,8 +68,18 @@ class ControllableEnvRandomizerFromConfig(
     except AttributeError:
       raise ValueError("Config {} is not found.".format(config))
     self._randomization_param_dict = config()
-    tf.logging.info("Randomization config is: {}".format(
-        self._randomization_param_dict))
+    tf.logging.info("Randomization config is: %s",
+                    self._randomization_param_dict)
+    # The config is fixed after construction, so the parameters are sorted and
+    # their rejection ranges collected once rather than on every reset.
+    self._sorted_param_items = sorted(self._randomization_param_dict.items())
+    self._rejection_param_range = {}
+    for param_name, random_range in self._sorted_param_items:
+      if len(random_range) == 4:
+        self._rejection_param_range[param_name] = [
+            random_range[2], random_range[3]
+        ]
+    self._sorted_reject_param_names = sorted(self._rejection_param_range)
 
     self._randomization_param_value_dict = {}
     self._randomization_seed = randomization_seed
@@ -57,7 +87,45 @@ class ControllableEnvRandomizerFromConfig(
     self._suspend_randomization = False
     self._verbose = verbose
 
-    self._np_random = np.random.RandomState()
+    self._rng = np.random.default_rng()
+    # The seed the generator was last built from and its initial state.
+    self._seeded_with = None
+    self._seeded_state = None
+    # Where each parameter's values sit in the flat sample vector drawn per
+    # reset. Built from the first robot passed in, see _build_sample_layout.
+    self._layout_robot = None
+    self._num_motors = None
+    self._motors_per_leg = None
+    self._sample_slices = {}
+    self._sample_dim = 0
+    self._leg_weaken_column = None
+    self._reject_columns = None
+    self._reject_lower = None
+    self._reject_upper = None
+    self._sample_buffer = None
+    # Sample, value and mask buffers reused by every rejection sampling batch.
+    self._rejection_buffers = None
+    # Per-parameter motor strength ratio buffers handed to the motor model.
+    self._strength_ratio_buffers = {}
+    self._param_bounds_width = param_bounds[1] - param_bounds[0]
+    self._inv_param_bounds_width = 1.0 / self._param_bounds_width
+
+    # Maps each parameter name to the method that randomizes it. The methods
+    # take the robot as their first argument.
+    self._randomization_function_dict = {
+        "mass": self._randomize_masses,
+        "individual mass": self._randomize_individual_masses,
+        "base mass": self._randomize_basemass,
+        "inertia": self._randomize_inertia,
+        "individual inertia": self._randomize_individual_inertia,
+        "global motor strength": self._randomize_global_motor_strength,
+        "control step": self._randomize_control_step,
+        "leg weaken": self._randomize_leg_weakening,
+        "single leg weaken": self._randomize_single_leg_weakening,
+    }
+    for param_name in DIRECT_SETTER_PARAMS:
+      self._randomization_function_dict[param_name] = functools.partial(
+          self._randomize_direct_param, param_name)
 
     return
 
@@ -78,480 +146,442 @@ class ControllableEnvRandomizerFromConfig(
   def randomization_seed(self, seed):
     self._randomization_seed = seed
 
-  def _check_all_randomization_parameter_in_rejection_range(self):
-    """Check if current randomized parameters are in the region to be rejected."""
+  def _denormalize(self, sample, lower_bound, upper_bound):
+    """Maps a sample from the param bounds onto [lower_bound, upper_bound].
 
-    for param_name, reject_random_range in sorted(
-        self._rejection_param_range.items()):
-      randomized_value = self._randomization_param_value_dict[param_name]
-      if np.any(randomized_value < reject_random_range[0]) or np.any(
-          randomized_value > reject_random_range[1]):
-        return False
-    return True
+    The scale and offset are combined as scalars first, so an array sample
+    costs one multiply and one add.
+    """
+    scale = (upper_bound - lower_bound) * self._inv_param_bounds_width
+    offset = lower_bound - self._param_bounds[0] * scale
+    return sample * scale + offset
+
+  def _scale_to_param_bounds(self, uniform_samples):
+    """Rescales samples from [0, 1) onto the param bounds in place."""
+    uniform_samples *= self._param_bounds_width
+    uniform_samples += self._param_bounds[0]
+    return uniform_samples
+
+  def _get_parameter_dim(self, param_name, robot):
+    """Returns the number of values sampled for param_name or None if scalar."""
+    if param_name in ("mass", "inertia", "leg weaken"):
+      return 2
+    if param_name == "individual mass":
+      return (len(robot.get_base_mass_from_urdf()) +
+              len(robot.get_leg_mass_from_urdf()))
+    if param_name == "individual inertia":
+      return (len(robot.get_base_inertia_from_urdf()) +
+              len(robot.get_leg_inertia_from_urdf())) * 3
+    if param_name in DIRECT_SETTER_PARAMS:
+      get_dim = DIRECT_SETTER_PARAMS[param_name][1]
+      return None if get_dim is None else get_dim(robot)
+    return None
+
+  def _build_sample_layout(self, robot):
+    """Assigns each parameter a fixed slice of one flat sample vector.
+
+    Scalars get a single column and vectors a contiguous slice, so all the
+    values of a reset come from one draw. The layout depends on the robot's
+    joint and link counts and is rebuilt only when the robot changes. The
+    motor counts read by the _randomize_* methods are cached along with it.
+
+    Args:
+      robot: The robot to be randomized.
+    """
+    self._layout_robot = robot
+    self._num_motors = robot.num_motors
+    self._motors_per_leg = self._num_motors // NUM_LEGS
+    self._sample_slices = {}
+    offset = 0
+    for param_name, _ in self._sorted_param_items:
+      dim = self._get_parameter_dim(param_name, robot)
+      if dim is None:
+        self._sample_slices[param_name] = offset
+        offset += 1
+      else:
+        self._sample_slices[param_name] = slice(offset, offset + dim)
+        offset += dim
+    self._sample_dim = offset
+    self._sample_buffer = np.empty(offset)
+    # The first leg weaken column holds the index of the weakened leg, which is
+    # drawn as an integer instead.
+    self._leg_weaken_column = None
+    if "leg weaken" in self._sample_slices:
+      self._leg_weaken_column = self._sample_slices["leg weaken"].start
+
+    if not self._rejection_param_range:
+      return
+    # Flatten the rejection ranges into per-column bounds, so that a whole batch
+    # is checked with one comparison pass.
+    reject_columns = [
+        np.atleast_1d(np.arange(offset)[self._sample_slices[param_name]])
+        for param_name in self._sorted_reject_param_names
+    ]
+    reject_dims = [len(columns) for columns in reject_columns]
+    self._reject_columns = np.concatenate(reject_columns)
+    self._reject_lower = np.repeat([
+        self._rejection_param_range[param_name][0]
+        for param_name in self._sorted_reject_param_names
+    ], reject_dims)
+    self._reject_upper = np.repeat([
+        self._rejection_param_range[param_name][1]
+        for param_name in self._sorted_reject_param_names
+    ], reject_dims)
+    batch_size = REJECTION_SAMPLING_BATCH_SIZE
+    reject_shape = (batch_size, len(self._reject_columns))
+    self._rejection_buffers = (np.empty((batch_size, offset)),
+                               np.empty(reject_shape),
+                               np.empty(reject_shape, dtype=bool),
+                               np.empty(reject_shape, dtype=bool),
+                               np.empty(batch_size, dtype=bool))
+
+  def _draw_samples(self, out):
+    """Fills out with normalized samples, one flat sample vector per row."""
+    self._rng.random(out=out)
+    self._scale_to_param_bounds(out)
+    if self._leg_weaken_column is not None:
+      batch_size = None if out.ndim == 1 else out.shape[0]
+      out[..., self._leg_weaken_column] = self._rng.integers(
+          NUM_LEGS, size=batch_size)
+    return out
+
+  def _split_samples(self, samples):
+    """Returns a dict from the parameter name to its part of samples."""
+    return {
+        param_name: samples[column_slice]
+        for param_name, column_slice in self._sample_slices.items()
+    }
+
+  def _sample_parameters(self, robot):
+    """Draws the normalized samples of all the parameters in one call.
+
+    Args:
+      robot: The robot to be randomized.
+
+    Returns:
+      A dict from the parameter name to its normalized sample.
+    """
+    return self._split_samples(self._draw_samples(self._sample_buffer))
+
+  def _sample_accepted_parameters(self, robot):
+    """Samples parameters until a set falls outside the rejection region.
+
+    Candidates are drawn REJECTION_SAMPLING_BATCH_SIZE at a time, and a set is
+    rejected if every value of every parameter with a rejection range lies in
+    that range. Nothing is applied to the robot while sampling.
+
+    Args:
+      robot: The robot to be randomized.
+
+    Returns:
+      A dict from the parameter name to its accepted normalized sample.
+
+    Raises:
+      ValueError: If no set is accepted in MAX_REJECTION_SAMPLING_BATCHES
+        batches.
+    """
+    samples, values, in_range, above_lower, rejected = self._rejection_buffers
+    for _ in range(MAX_REJECTION_SAMPLING_BATCHES):
+      self._draw_samples(samples)
+      np.take(samples, self._reject_columns, axis=1, out=values)
+      np.greater_equal(values, self._reject_lower, out=above_lower)
+      np.less_equal(values, self._reject_upper, out=in_range)
+      in_range &= above_lower
+      np.all(in_range, axis=1, out=rejected)
+      # argmin stops at the first accepted set, and only lands on a rejected
+      # one if the whole batch was rejected.
+      accepted_index = np.argmin(rejected)
+      if not rejected[accepted_index]:
+        return self._split_samples(samples[accepted_index].copy())
+    raise ValueError(
+        "No parameters outside the rejection ranges {} were sampled in {} "
+        "tries.".format(self._rejection_param_range,
+                        MAX_REJECTION_SAMPLING_BATCHES *
+                        REJECTION_SAMPLING_BATCH_SIZE))
 
   def randomize_env(self, robot):
     """Randomize various physical properties of the environment.
     It randomizes the physical parameters according to the input configuration.
     """
 
+    if robot is not self._layout_robot:
+      self._build_sample_layout(robot)
     if not self.suspend_randomization:
-      # Use a specific seed for controllable randomization.
+      # Use a specific seed for controllable randomization. Every reset starts
+      # from the same seeded state, so a fixed seed gives the same draws each
+      # time. The generator is only rebuilt when the seed changes.
       if self._randomization_seed is not None:
-        self._np_random.seed(self._randomization_seed)
-
-      self._randomization_function_dict = self._build_randomization_function_dict(robot)
+        if self._randomization_seed != self._seeded_with:
+          self._rng = np.random.default_rng(self._randomization_seed)
+          self._seeded_state = self._rng.bit_generator.state
+          self._seeded_with = self._randomization_seed
+        else:
+          self._rng.bit_generator.state = self._seeded_state
 
-      self._rejection_param_range = {}
-      for param_name, random_range in sorted(
-          self._randomization_param_dict.items()):
-        self._randomization_function_dict[param_name](
-            lower_bound=random_range[0], upper_bound=random_range[1])
-        if len(random_range) == 4:
-          self._rejection_param_range[param_name] = [
-              random_range[2], random_range[3]
-          ]
       if self._rejection_param_range:
-        while self._check_all_randomization_parameter_in_rejection_range():
-          for param_name, random_range in sorted(
-              self._randomization_param_dict.items()):
-            self._randomization_function_dict[param_name](
-                lower_bound=random_range[0], upper_bound=random_range[1])
+        # Reject in batch first, so only the accepted set reaches the robot.
+        parameters = self._sample_accepted_parameters(robot)
+      else:
+        parameters = self._sample_parameters(robot)
+      for param_name, random_range in self._sorted_param_items:
+        self._randomization_function_dict[param_name](
+            robot,
+            lower_bound=random_range[0],
+            upper_bound=random_range[1],
+            parameters=parameters[param_name])
     elif self._randomization_param_value_dict:
       # Re-apply the randomization because hard_reset might change previously
       # randomized parameters.
       self.set_env_from_randomization_parameters(self._randomization_param_value_dict, robot)
 
   def get_randomization_parameters(self):
-    return copy.deepcopy(self._randomization_param_value_dict)
+    # The values are flat arrays, lists or scalars, so copying the containers
+    # is enough to detach them from the buffers reused by later resets.
+    return {
+        param_name: (value.copy() if isinstance(value, (np.ndarray, list))
+                     else value)
+        for param_name, value in self._randomization_param_value_dict.items()
+    }
 
   def set_env_from_randomization_parameters(self, randomization_parameters, robot):
+    if robot is not self._layout_robot:
+      self._build_sample_layout(robot)
     self._randomization_param_value_dict = randomization_parameters
-    # Run the randomization function to propgate the parameters.
-    self._randomization_function_dict = self._build_randomization_function_dict(robot)
+    # Run the randomization function to propgate the parameters. Every setter
+    # is called even if its value is unchanged: the robot already skips
+    # repeated changeDynamics calls and forgets them when the URDF is reloaded,
+    # while the joint friction is cleared by reset_pose on every reset.
     for param_name, random_range in self._randomization_param_dict.items():
       self._randomization_function_dict[param_name](
+          robot,
           lower_bound=random_range[0],
           upper_bound=random_range[1],
           parameters=randomization_parameters[param_name])
 
-  def _build_randomization_function_dict(self, robot):
-    func_dict = {}
-    func_dict["mass"] = functools.partial(
-        self._randomize_masses, minitaur=robot)
-    func_dict["individual mass"] = functools.partial(
-        self._randomize_individual_masses, minitaur=robot)
-    func_dict["base mass"] = functools.partial(
-        self._randomize_basemass, minitaur=robot)
-    func_dict["inertia"] = functools.partial(
-        self._randomize_inertia, minitaur=robot)
-    func_dict["individual inertia"] = functools.partial(
-        self._randomize_individual_inertia, minitaur=robot)
-    func_dict["latency"] = functools.partial(
-        self._randomize_latency, minitaur=robot)
-    func_dict["joint friction"] = functools.partial(
-        self._randomize_joint_friction, minitaur=robot)
-    func_dict["motor friction"] = functools.partial(
-        self._randomize_motor_friction, minitaur=robot)
-    func_dict["restitution"] = functools.partial(
-        self._randomize_contact_restitution, minitaur=robot)
-    func_dict["lateral friction"] = functools.partial(
-        self._randomize_contact_friction, minitaur=robot)
-    func_dict["battery"] = functools.partial(
-        self._randomize_battery_level, minitaur=robot)
-    func_dict["motor strength"] = functools.partial(
-        self._randomize_motor_strength, minitaur=robot)
-    func_dict["global motor strength"] = functools.partial(
-        self._randomize_global_motor_strength, minitaur=robot)
-    # Setting control step needs access to the environment.
-    func_dict["control step"] = functools.partial(
-        self._randomize_control_step, robot)
-    func_dict["leg weaken"] = functools.partial(
-        self._randomize_leg_weakening, minitaur=robot)
-    func_dict["single leg weaken"] = functools.partial(
-        self._randomize_single_leg_weakening, minitaur=robot)
-    return func_dict
-
   def _randomize_control_step(self,
                               robot,
                               lower_bound,
                               upper_bound,
-                              parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
+                              parameters):
+    sample = parameters
     self._randomization_param_value_dict["control step"] = sample
-    randomized_control_step = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    randomized_control_step = self._denormalize(
+        sample, lower_bound, upper_bound)
     randomized_control_step = int(randomized_control_step)
     robot.SetTimeSteps(randomized_control_step)
     if self._verbose:
-      tf.logging.info("control step is: {}".format(randomized_control_step))
+      tf.logging.info("control step is: %s", randomized_control_step)
 
   def _randomize_masses(self,
                         minitaur,
                         lower_bound,
                         upper_bound,
-                        parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform([self._param_bounds[0]] * 2,
-                                       [self._param_bounds[1]] * 2)
-    else:
-      sample = parameters
+                        parameters):
+    sample = parameters
 
     self._randomization_param_value_dict["mass"] = sample
-    randomized_mass_ratios = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    randomized_mass_ratios = self._denormalize(sample, lower_bound, upper_bound)
 
     base_mass = minitaur.get_base_mass_from_urdf()
     random_base_ratio = randomized_mass_ratios[0]
-    randomized_base_mass = random_base_ratio * np.array(base_mass)
+    randomized_base_mass = random_base_ratio * np.asarray(base_mass)
     minitaur.set_base_mass(randomized_base_mass)
     if self._verbose:
-      tf.logging.info("base mass is: {}".format(randomized_base_mass))
+      tf.logging.info("base mass is: %s", randomized_base_mass)
 
     leg_masses = minitaur.get_leg_mass_from_urdf()
     random_leg_ratio = randomized_mass_ratios[1]
-    randomized_leg_masses = random_leg_ratio * np.array(leg_masses)
+    randomized_leg_masses = random_leg_ratio * np.asarray(leg_masses)
     minitaur.set_leg_mass(randomized_leg_masses)
     if self._verbose:
-      tf.logging.info("leg mass is: {}".format(randomized_leg_masses))
+      tf.logging.info("leg mass is: %s", randomized_leg_masses)
 
   def _randomize_individual_masses(self,
                                    minitaur,
                                    lower_bound,
                                    upper_bound,
-                                   parameters=None):
+                                   parameters):
     base_mass = minitaur.get_base_mass_from_urdf()
     leg_masses = minitaur.get_leg_mass_from_urdf()
     param_dim = len(base_mass) + len(leg_masses)
-    if parameters is None:
-      sample = self._np_random.uniform([self._param_bounds[0]] * param_dim,
-                                       [self._param_bounds[1]] * param_dim)
-    else:
-      sample = parameters
+    sample = parameters
     self._randomization_param_value_dict["individual mass"] = sample
-    randomized_mass_ratios = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    randomized_mass_ratios = self._denormalize(sample, lower_bound, upper_bound)
 
     random_base_ratio = randomized_mass_ratios[0:len(base_mass)]
-    randomized_base_mass = random_base_ratio * np.array(base_mass)
+    randomized_base_mass = random_base_ratio * np.asarray(base_mass)
     minitaur.set_base_mass(randomized_base_mass)
     if self._verbose:
-      tf.logging.info("base mass is: {}".format(randomized_base_mass))
+      tf.logging.info("base mass is: %s", randomized_base_mass)
 
     random_leg_ratio = randomized_mass_ratios[len(base_mass):]
-    randomized_leg_masses = random_leg_ratio * np.array(leg_masses)
+    randomized_leg_masses = random_leg_ratio * np.asarray(leg_masses)
     minitaur.set_leg_mass(randomized_leg_masses)
     if self._verbose:
-      tf.logging.info("randomization dim: {}".format(param_dim))
-      tf.logging.info("leg mass is: {}".format(randomized_leg_masses))
+      tf.logging.info("randomization dim: %s", param_dim)
+      tf.logging.info("leg mass is: %s", randomized_leg_masses)
 
   def _randomize_basemass(self,
                           minitaur,
                           lower_bound,
                           upper_bound,
-                          parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
+                          parameters):
+    sample = parameters
     self._randomization_param_value_dict["base mass"] = sample
-    randomized_mass_ratios = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    randomized_mass_ratios = self._denormalize(sample, lower_bound, upper_bound)
 
     base_mass = minitaur.get_base_mass_from_urdf()
     random_base_ratio = randomized_mass_ratios
-    randomized_base_mass = random_base_ratio * np.array(base_mass)
+    randomized_base_mass = random_base_ratio * np.asarray(base_mass)
     minitaur.set_base_mass(randomized_base_mass)
     if self._verbose:
-      tf.logging.info("base mass is: {}".format(randomized_base_mass))
+      tf.logging.info("base mass is: %s", randomized_base_mass)
 
   def _randomize_individual_inertia(self,
                                     minitaur,
                                     lower_bound,
                                     upper_bound,
-                                    parameters=None):
+                                    parameters):
     base_inertia = minitaur.get_base_inertia_from_urdf()
     leg_inertia = minitaur.get_leg_inertia_from_urdf()
     param_dim = (len(base_inertia) + len(leg_inertia)) * 3
 
-    if parameters is None:
-      sample = self._np_random.uniform([self._param_bounds[0]] * param_dim,
-                                       [self._param_bounds[1]] * param_dim)
-    else:
-      sample = parameters
+    sample = parameters
     self._randomization_param_value_dict["individual inertia"] = sample
-    randomized_inertia_ratios = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    randomized_inertia_ratios = self._denormalize(
+        sample, lower_bound, upper_bound)
     random_base_ratio = np.reshape(
         randomized_inertia_ratios[0:len(base_inertia) * 3],
         (len(base_inertia), 3))
-    randomized_base_inertia = random_base_ratio * np.array(base_inertia)
+    randomized_base_inertia = random_base_ratio * np.asarray(base_inertia)
     minitaur.set_base_inertia(randomized_base_inertia)
     if self._verbose:
-      tf.logging.info("base inertia is: {}".format(randomized_base_inertia))
+      tf.logging.info("base inertia is: %s", randomized_base_inertia)
     random_leg_ratio = np.reshape(
         randomized_inertia_ratios[len(base_inertia) * 3:],
         (len(leg_inertia), 3))
-    randomized_leg_inertia = random_leg_ratio * np.array(leg_inertia)
+    randomized_leg_inertia = random_leg_ratio * np.asarray(leg_inertia)
     minitaur.set_leg_inertia(randomized_leg_inertia)
     if self._verbose:
-      tf.logging.info("leg inertia is: {}".format(randomized_leg_inertia))
+      tf.logging.info("leg inertia is: %s", randomized_leg_inertia)
 
   def _randomize_inertia(self,
                          minitaur,
                          lower_bound,
                          upper_bound,
-                         parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform([self._param_bounds[0]] * 2,
-                                       [self._param_bounds[1]] * 2)
-    else:
-      sample = parameters
+                         parameters):
+    sample = parameters
     self._randomization_param_value_dict["inertia"] = sample
-    randomized_inertia_ratios = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    randomized_inertia_ratios = self._denormalize(
+        sample, lower_bound, upper_bound)
 
     base_inertia = minitaur.get_base_inertia_from_urdf()
     random_base_ratio = randomized_inertia_ratios[0]
-    randomized_base_inertia = random_base_ratio * np.array(base_inertia)
+    randomized_base_inertia = random_base_ratio * np.asarray(base_inertia)
     minitaur.set_base_inertia(randomized_base_inertia)
     if self._verbose:
-      tf.logging.info("base inertia is: {}".format(randomized_base_inertia))
+      tf.logging.info("base inertia is: %s", randomized_base_inertia)
     leg_inertia = minitaur.get_leg_inertia_from_urdf()
     random_leg_ratio = randomized_inertia_ratios[1]
-    randomized_leg_inertia = random_leg_ratio * np.array(leg_inertia)
+    randomized_leg_inertia = random_leg_ratio * np.asarray(leg_inertia)
     minitaur.set_leg_inertia(randomized_leg_inertia)
     if self._verbose:
-      tf.logging.info("leg inertia is: {}".format(randomized_leg_inertia))
+      tf.logging.info("leg inertia is: %s", randomized_leg_inertia)
 
-  def _randomize_latency(self,
-                         minitaur,
-                         lower_bound,
-                         upper_bound,
-                         parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
-    self._randomization_param_value_dict["latency"] = sample
-    randomized_latency = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
-
-    minitaur.set_ctrl_latency(randomized_latency)
-    if self._verbose:
-      tf.logging.info("control latency is: {}".format(randomized_latency))
-
-  def _randomize_joint_friction(self,
-                                minitaur,
-                                lower_bound,
-                                upper_bound,
-                                parameters=None):
-    num_knee_joints = minitaur.get_num_knee_joints()
-
-    if parameters is None:
-      sample = self._np_random.uniform(
-          [self._param_bounds[0]] * num_knee_joints,
-          [self._param_bounds[1]] * num_knee_joints)
-    else:
-      sample = parameters
-    self._randomization_param_value_dict["joint friction"] = sample
-    randomized_joint_frictions = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
-
-    minitaur.set_joint_friction(randomized_joint_frictions)
-    if self._verbose:
-      tf.logging.info(
-          "joint friction is: {}".format(randomized_joint_frictions))
-
-  def _randomize_motor_friction(self,
-                                minitaur,
-                                lower_bound,
-                                upper_bound,
-                                parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
-    self._randomization_param_value_dict["motor friction"] = sample
-    randomized_motor_damping = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
-
-    minitaur.set_motor_viscous_damping(randomized_motor_damping)
-    if self._verbose:
-      tf.logging.info("motor friction is: {}".format(randomized_motor_damping))
-
-  def _randomize_contact_restitution(self,
-                                     minitaur,
-                                     lower_bound,
-                                     upper_bound,
-                                     parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
-    self._randomization_param_value_dict["restitution"] = sample
-    randomized_restitution = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
-
-    minitaur.set_foot_restitution(randomized_restitution)
-    if self._verbose:
-      tf.logging.info("foot restitution is: {}".format(randomized_restitution))
-
-  def _randomize_contact_friction(self,
-                                  minitaur,
-                                  lower_bound,
-                                  upper_bound,
-                                  parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
-    self._randomization_param_value_dict["lateral friction"] = sample
-    randomized_foot_friction = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
-
-    minitaur.set_foot_friction(randomized_foot_friction)
-    if self._verbose:
-      tf.logging.info("foot friction is: {}".format(randomized_foot_friction))
+  def _randomize_direct_param(self,
+                              param_name,
+                              minitaur,
+                              lower_bound,
+                              upper_bound,
+                              parameters):
+    """Randomizes a parameter whose value goes straight to one robot setter.
+
+    Args:
+      param_name: A key of DIRECT_SETTER_PARAMS.
+      minitaur: The robot to be randomized.
+      lower_bound: The lower bound of the randomized value.
+      upper_bound: The upper bound of the randomized value.
+      parameters: The normalized sample to apply.
+    """
+    setter_name, _, log_name = DIRECT_SETTER_PARAMS[param_name]
+    sample = parameters
+    self._randomization_param_value_dict[param_name] = sample
+    randomized_value = self._denormalize(sample, lower_bound, upper_bound)
 
-  def _randomize_battery_level(self,
-                               minitaur,
-                               lower_bound,
-                               upper_bound,
-                               parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
-    self._randomization_param_value_dict["battery"] = sample
-    randomized_battery_voltage = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
-
-    minitaur.set_battery_voltage(randomized_battery_voltage)
+    getattr(minitaur, setter_name)(randomized_value)
     if self._verbose:
-      tf.logging.info(
-          "battery voltage is: {}".format(randomized_battery_voltage))
+      tf.logging.info("%s is: %s", log_name, randomized_value)
+
+  def _get_strength_ratio_buffer(self, param_name):
+    """Returns the reused motor strength ratio buffer of param_name."""
+    ratios = self._strength_ratio_buffers.get(param_name)
+    if ratios is None or ratios.size != self._num_motors:
+      ratios = self._strength_ratio_buffers[param_name] = np.empty(
+          self._num_motors)
+    return ratios
 
   def _randomize_global_motor_strength(self,
                                        minitaur,
                                        lower_bound,
                                        upper_bound,
-                                       parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(self._param_bounds[0],
-                                       self._param_bounds[1])
-    else:
-      sample = parameters
+                                       parameters):
+    sample = parameters
     self._randomization_param_value_dict["global motor strength"] = sample
-    randomized_motor_strength_ratio = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    randomized_motor_strength_ratio = self._denormalize(
+        sample, lower_bound, upper_bound)
 
-    minitaur.set_motor_strength_ratios([randomized_motor_strength_ratio] *
-                                    minitaur.num_motors)
-    if self._verbose:
-      tf.logging.info("global motor strength is: {}".format(
-          randomized_motor_strength_ratio))
-
-  def _randomize_motor_strength(self,
-                                minitaur,
-                                lower_bound,
-                                upper_bound,
-                                parameters=None):
-    if parameters is None:
-      sample = self._np_random.uniform(
-          [self._param_bounds[0]] * minitaur.num_motors,
-          [self._param_bounds[1]] * minitaur.num_motors)
-    else:
-      sample = parameters
-    self._randomization_param_value_dict["motor strength"] = sample
-    randomized_motor_strength_ratios = (sample - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
-
-    minitaur.set_motor_strength_ratios(randomized_motor_strength_ratios)
+    motor_strength_ratios = self._get_strength_ratio_buffer(
+        "global motor strength")
+    motor_strength_ratios.fill(randomized_motor_strength_ratio)
+    minitaur.set_motor_strength_ratios(motor_strength_ratios)
     if self._verbose:
-      tf.logging.info(
-          "motor strength is: {}".format(randomized_motor_strength_ratios))
+      tf.logging.info("global motor strength is: %s",
+                      randomized_motor_strength_ratio)
 
   def _randomize_leg_weakening(self,
                                minitaur,
                                lower_bound,
                                upper_bound,
-                               parameters=None):
-    motor_per_leg = int(minitaur.num_motors / NUM_LEGS)
-    if parameters is None:
-      # First choose which leg to weaken
-      leg_to_weaken = self._np_random.randint(NUM_LEGS)
-
-      # Choose what ratio to randomize
-      normalized_ratio = self._np_random.uniform(self._param_bounds[0],
-                                                 self._param_bounds[1])
-      sample = [leg_to_weaken, normalized_ratio]
-    else:
-      sample = [parameters[0], parameters[1]]
-      leg_to_weaken = sample[0]
-      normalized_ratio = sample[1]
+                               parameters):
+    motor_per_leg = self._motors_per_leg
+    # The first value is the leg to weaken and the second its ratio.
+    sample = [int(parameters[0]), parameters[1]]
+    leg_to_weaken = sample[0]
+    normalized_ratio = sample[1]
 
     self._randomization_param_value_dict["leg weaken"] = sample
 
-    leg_weaken_ratio = (normalized_ratio - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    leg_weaken_ratio = self._denormalize(
+        normalized_ratio, lower_bound, upper_bound)
 
-    motor_strength_ratios = np.ones(minitaur.num_motors)
+    motor_strength_ratios = self._get_strength_ratio_buffer("leg weaken")
+    motor_strength_ratios.fill(1.0)
     motor_strength_ratios[leg_to_weaken * motor_per_leg:(leg_to_weaken + 1) *
                           motor_per_leg] = leg_weaken_ratio
     minitaur.set_motor_strength_ratios(motor_strength_ratios)
     if self._verbose:
-      tf.logging.info("weakening leg {} with ratio: {}".format(
-          leg_to_weaken, leg_weaken_ratio))
+      tf.logging.info("weakening leg %s with ratio: %s",
+                      leg_to_weaken, leg_weaken_ratio)
 
   def _randomize_single_leg_weakening(self,
                                       minitaur,
                                       lower_bound,
                                       upper_bound,
-                                      parameters=None):
-    motor_per_leg = int(minitaur.num_motors / NUM_LEGS)
+                                      parameters):
+    motor_per_leg = self._motors_per_leg
     leg_to_weaken = 0
-    if parameters is None:
-      # Choose what ratio to randomize
-      normalized_ratio = self._np_random.uniform(self._param_bounds[0],
-                                                 self._param_bounds[1])
-    else:
-      normalized_ratio = parameters
+    normalized_ratio = parameters
 
     self._randomization_param_value_dict["single leg weaken"] = normalized_ratio
 
-    leg_weaken_ratio = (normalized_ratio - self._param_bounds[0]) / (
-        self._param_bounds[1] -
-        self._param_bounds[0]) * (upper_bound - lower_bound) + lower_bound
+    leg_weaken_ratio = self._denormalize(
+        normalized_ratio, lower_bound, upper_bound)
 
-    motor_strength_ratios = np.ones(minitaur.num_motors)
+    motor_strength_ratios = self._get_strength_ratio_buffer("single leg weaken")
+    motor_strength_ratios.fill(1.0)
     motor_strength_ratios[leg_to_weaken * motor_per_leg:(leg_to_weaken + 1) *
                           motor_per_leg] = leg_weaken_ratio
     minitaur.set_motor_strength_ratios(motor_strength_ratios)
     if self._verbose:
-      tf.logging.info("weakening leg {} with ratio: {}".format(
-          leg_to_weaken, leg_weaken_ratio))
+      tf.logging.info("weakening leg %s with ratio: %s",
+                      leg_to_weaken, leg_weaken_ratio)